@@ -1,8 +1,27 @@
 import pickle
 import pandas as pd
+import numpy as np
 import re
-from datetime import datetime
 import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+# -----------------------
+# Regular Expressions
+# -----------------------
+
+TOOTH_CODE_RE = re.compile(r'\bT(\d{1,2})\b')  # Tooth codes such as "T18"
+MISSING_TEETH_RE = re.compile(r'(\d{4}-\d{2}-\d{2}) - Tooth (\d{1,2})')  # "<date> - Tooth <n>" entries in 'Missing Issues'
+STANDARD_RE = re.compile(r'^\s*\d{1,2}(?:\s{1,2}\d{1,2}){2}\s*$')  # Standard format of the pockets data: "x y z"
+TOOTH_COL_RE = re.compile(r'Tooth (\d{1,2})')  # Tooth number in a column name
+AGG_ITEM_RE = re.compile(r'^Tooth (\d{1,2}) (P|B)')  # Tooth number and side in a recorded issue
+TABLE_ROW_RE = re.compile(r'    <tr>\n.*?    </tr>\n', re.S)  # Body row of a table rendered by Styler.to_html
+ELEMENT_ID_RE = re.compile(r' id="[^"]*"')  # id attribute of a table or header cell rendered by Styler.to_html
+
+# Cell styles indexed by the style codes of highlight_cells
+CELL_STYLES = np.array(['',
+                        'background-color: #FFFF00',
+                        'background-color: green',
+                        'background-color: lightcoral'], dtype=object)
 
 # -----------------------
 # Data Loading Functions
@@ -12,19 +31,17 @@ def load_data():
     """
     Load DataFrames from pickle files.
     Returns:
-        missing_snapshots_df (DataFrame): DataFrame containing missing snapshots.
+        missing_snapshots_df (DataFrame): ResearchID and Missing Issues of the missing snapshots.
         pockets_snapshots_df (DataFrame): DataFrame containing pockets snapshots.
     """
+    # Only the Missing Issues text is used downstream, so the other columns are released right away
     with open("Data_PKL/missing_snapshots.pkl", "rb") as f:
-        missing_snapshots_df = pickle.load(f)
+        missing_snapshots_df = pickle.load(f)[['ResearchID', 'Missing Issues']]
 
     with open("Data_PKL/pockets_snapshots.pkl", "rb") as f:
         pockets_snapshots_df = pickle.load(f)
 
-    with open("Data_PKL/recessions_snapshots.pkl", "rb") as f:
-        recessions_snapshots_df = pickle.load(f)
-
-    return missing_snapshots_df, pockets_snapshots_df, recessions_snapshots_df
+    return missing_snapshots_df, pockets_snapshots_df
 
 # -----------------------
 # Data Processing Functions
@@ -34,128 +51,176 @@ def replace_tooth_codes(text):
     """
     Replace tooth codes in the text from 'TXX' to 'Tooth XX'.
     Args:
-        text (str): Input text containing tooth codes.
+        text (Series): Column of text containing tooth codes.
     Returns:
-        str: Text with replaced tooth codes.
+        Series: Text with replaced tooth codes, with missing values left as they are.
     """
-    return re.sub(r'\bT(\d{1,2})\b', r'Tooth \1', text)
+    return text.str.replace(TOOTH_CODE_RE, r'Tooth \1', regex=True)
 
 def extract_missing_teeth_with_dates(missing_issues):
     """
     Extract missing teeth with dates from the 'Missing Issues' column.
     Args:
-        missing_issues (str): Text containing missing issues.
+        missing_issues (Series): Column of text containing missing issues.
     Returns:
-        list: List of tuples containing date and tooth number.
+        Series: Lists of tuples containing date and tooth number, aligned to the input index.
     """
-    if isinstance(missing_issues, str):
-        matches = re.findall(r'(\d{4}-\d{2}-\d{2}) - Tooth (\d{1,2})', missing_issues)
-        return [(datetime.strptime(date, '%Y-%m-%d'), tooth) for date, tooth in matches]
-    return []
+    matches = missing_issues.str.extractall(MISSING_TEETH_RE)
+    dates = pd.to_datetime(matches[0], format='%Y-%m-%d', cache=True)
+    pairs = pd.Series(list(zip(dates, matches[1])), index=matches.index.get_level_values(0), dtype=object)
+    grouped = pairs.groupby(level=0).agg(list).reindex(missing_issues.index)
+    return grouped.apply(lambda x: x if isinstance(x, list) else [])
 
-def record_cells(row, combined_df):
+def get_tooth_columns(columns):
     """
-    Process each row to identify missing teeth and data issues.
-    Updates the combined_df with information about missing teeth and data issues.
+    Find the pockets data columns ('Tooth XX P' / 'Tooth XX B') and their tooth numbers.
     Args:
-        row (Series): A row from combined_df.
-        combined_df (DataFrame): The combined DataFrame to update.
+        columns (Index): Column names to scan.
+    Returns:
+        list: List of tuples containing column name and tooth number.
     """
-    missing_teeth_dates = row['Missing Teeth with Dates']
-    chart_date = datetime.strptime(row['CHART DATE'], '%Y-%m-%d')
+    tooth_cols = []
+    for col in columns:
+        if col.startswith("Tooth") and (" P" in col or " B" in col):
+            tooth_match = TOOTH_COL_RE.search(col)
+            if tooth_match:
+                tooth_cols.append((col, tooth_match.group(1)))
+    return tooth_cols
 
-    # Initialize sets to collect issues
-    missing_pockets_and_record = set()
-    missing_pockets_not_record = set()
-    missing_pockets_other_issue = set()
-    integer_error = set()
+def classify_cells(combined_df):
+    """
+    Classify every tooth cell of combined_df at once.
+    The tooth columns are taken as one 2-D block and each issue becomes a boolean mask over it.
+    Args:
+        combined_df (DataFrame): The combined DataFrame.
+    Returns:
+        dict: Boolean DataFrame per issue, indexed like combined_df with one column per tooth column.
+    """
+    tooth_cols = get_tooth_columns(combined_df.columns)
+    col_names = [col for col, _ in tooth_cols]
+
+    # Tooth cells as a (rows, tooth columns) block
+    values = combined_df[col_names].to_numpy()
+    is_na = pd.isna(values)
+
+    # Only recorded cells need the format check
+    is_standard = np.zeros(values.shape, dtype=bool)
+    is_standard[~is_na] = pd.Series(values[~is_na]).astype(str).str.match(STANDARD_RE).to_numpy(dtype=bool)
+
+    # One record per (row, missing date, tooth) from the patient report, mapped onto the block positions
+    missing = combined_df['Missing Teeth with Dates'].explode().dropna()
+    rows = combined_df.index.get_indexer(missing.index)
+    missing = pd.DataFrame(missing.tolist(), columns=['missing_date', 'tooth']).assign(row=rows)
+    missing = missing.merge(
+        pd.DataFrame({'tooth': [tooth for _, tooth in tooth_cols], 'position': range(len(tooth_cols))}),
+        on='tooth'
+    )
 
-    # Define the pattern for the standard format "x y z"
-    standard_pattern = re.compile(r'^\s*\d{1,2}(?:\s{1,2}\d{1,2}){2}\s*$')
+    # Earliest missing date of each (row, tooth column) as int64 nanoseconds, no_date where none is recorded
+    no_date = np.iinfo(np.int64).max
+    earliest_missing = np.full(values.shape, no_date, dtype=np.int64)
+    np.minimum.at(
+        earliest_missing,
+        (missing['row'].to_numpy(), missing['position'].to_numpy()),
+        pd.to_datetime(missing['missing_date']).to_numpy(dtype='datetime64[ns]').view(np.int64)
+    )
+    chart_dates = combined_df['CHART DATE DT'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+    # A tooth is confirmed missing once its earliest missing date is on or before the chart date
+    # (a missing chart date is the smallest int64, so it never qualifies)
+    is_recorded = earliest_missing != no_date
+    is_missing_tooth = earliest_missing <= chart_dates[:, None]
+
+    # Incorrect integer format takes precedence, then confirmed missing teeth, then NaN values
+    integer_error = ~is_na & ~is_standard
+    unexplained_na = ~integer_error & ~is_missing_tooth & is_na
+    masks = {
+        'integer_error': integer_error,
+        'missing_and_record': ~integer_error & is_missing_tooth,
+        'missing_not_record': unexplained_na & ~is_recorded,
+        'missing_other_issue': unexplained_na & is_recorded,
+    }
+    return {name: pd.DataFrame(mask, index=combined_df.index, columns=col_names)
+            for name, mask in masks.items()}
 
-    # Iterate over columns related to teeth
-    for col in row.index:
-        if col.startswith("Tooth") and (" P" in col or " B" in col):
-            # Extract tooth number from the column name
-            tooth_match = re.search(r'Tooth (\d{1,2})', col)
-            if not tooth_match:
-                continue
-            tooth_num = tooth_match.group(1)
-            cell_value = row[col]
-
-            # Check for incorrect integer format (highlighted in yellow)
-            if pd.notna(cell_value) and not standard_pattern.match(str(cell_value)):
-                integer_error.add(f"{col}")
-                continue  # Skip further checks for this cell
-
-            # Check if the tooth is confirmed missing in records
-            is_missing_tooth = any(
-                tooth == tooth_num and missing_date <= chart_date
-                for missing_date, tooth in missing_teeth_dates
-            )
-
-            if is_missing_tooth:
-                missing_pockets_and_record.add(f"{col}")
-                continue  # Skip to next cell
-
-            # Check for NaN values not recorded elsewhere
-            if pd.isna(cell_value):
-                if not any(tooth == tooth_num for _, tooth in missing_teeth_dates):
-                    missing_pockets_not_record.add(f"{col}")
-                else:
-                    missing_pockets_other_issue.add(f"{col}")
-
-    # Update combined_df with the collected issues
-    combined_df.at[row.name, 'Missing Teeth In Pockets Data, And Is Recorded In Patient Report (Likely Missing)'] = ', '.join(sorted(missing_pockets_and_record))
-    combined_df.at[row.name, 'Missing Teeth In Pockets Data, But Not In Patient Report'] = ', '.join(sorted(missing_pockets_not_record))
-    combined_df.at[row.name, 'Missing Teeth In Pockets Data, Other Issues'] = ', '.join(sorted(missing_pockets_other_issue))
-    combined_df.at[row.name, 'Teeth Integer Data Is Not Complete'] = ', '.join(sorted(integer_error))
-
-def aggregate_issues(group):
-    """
-    Aggregate issues for each ResearchID group.
+def record_cells(combined_df, cells):
+    """
+    Collect the missing teeth and data issues of each row.
     Args:
-        group (DataFrame): Grouped DataFrame by ResearchID.
+        combined_df (DataFrame): The combined DataFrame.
+        cells (dict): Boolean masks per issue, from classify_cells.
     Returns:
-        Series: Aggregated issues for the group.
+        DataFrame: The four issue columns, aligned to the index of combined_df.
+    """
+    def join_columns(mask):
+        # Sort the columns by name once, so np.nonzero yields each row's names in order
+        mask = mask.sort_index(axis=1)
+        rows, positions = np.nonzero(mask.to_numpy())
+        joined = (
+            pd.Series(mask.columns[positions], index=mask.index[rows])
+            .groupby(level=0)
+            .agg(', '.join)
+        )
+        return joined.reindex(combined_df.index, fill_value='')
+
+    return pd.DataFrame({
+        'Missing Teeth In Pockets Data, And Is Recorded In Patient Report (Likely Missing)':
+            join_columns(cells['missing_and_record']),
+        'Missing Teeth In Pockets Data, But Not In Patient Report':
+            join_columns(cells['missing_not_record']),
+        'Missing Teeth In Pockets Data, Other Issues':
+            join_columns(cells['missing_other_issue']),
+        'Teeth Integer Data Is Not Complete':
+            join_columns(cells['integer_error'])
+    }, index=combined_df.index)
+
+def aggregate_issues(combined_df):
     """
+    Aggregate issues for each ResearchID.
+    Args:
+        combined_df (DataFrame): The combined DataFrame with the recorded issue columns.
+    Returns:
+        DataFrame: Aggregated issues, indexed by ResearchID.
+    """
+    research_ids = pd.Index(sorted(combined_df['ResearchID'].unique()), name='ResearchID')
+
     def aggregate_column(column_name):
-        unique_entries = group[['CHART DATE', column_name]].dropna()
-        tooth_dict = {}
-
-        for _, row in unique_entries.iterrows():
-            date_str = row['CHART DATE']
-            entries = row[column_name].split(', ')
-            for item in entries:
-                match = re.match(r'Tooth (\d{1,2}) (P|B)', item.strip())
-                if match:
-                    tooth, side = match.groups()
-                    if tooth not in tooth_dict:
-                        tooth_dict[tooth] = {}
-                    # Only add the first occurrence of the date for each side
-                    if side not in tooth_dict[tooth]:
-                        tooth_dict[tooth][side] = date_str  # Record the first date only
+        unique_entries = combined_df[['ResearchID', 'CHART DATE', column_name]].dropna()
+
+        # One record per recorded tooth side, e.g. "Tooth 18 B"
+        items = unique_entries.assign(item=unique_entries[column_name].str.split(', ')).explode('item')
+        items[['tooth', 'side']] = items['item'].str.strip().str.extract(AGG_ITEM_RE)
+        items = items.dropna(subset=['tooth'])
+
+        # Only keep the first date each side of a tooth appears (rows are sorted by date)
+        first_dates = (
+            items.drop_duplicates(['ResearchID', 'tooth', 'side'])
+            .pivot(index=['ResearchID', 'tooth'], columns='side', values='CHART DATE')
+            .reindex(columns=['B', 'P'])
+            .reset_index()
+        )
+        tooth = 'Tooth ' + first_dates['tooth']
+        date_b, date_p = first_dates['B'], first_dates['P']
 
         # Format each tooth with its side and the first date it appears
-        formatted_teeth = []
-        for tooth, sides in sorted(tooth_dict.items()):
-            if 'P' in sides and 'B' in sides:
-                date_p = sides['P']
-                date_b = sides['B']
-                if date_p == date_b:
-                    # Same date for both sides
-                    formatted_teeth.append(f"Tooth {tooth} - B & P - {date_p}")
-                else:
-                    formatted_teeth.append(f"Tooth {tooth} - (B - {date_b}) / (P - {date_p})")
-            elif 'P' in sides:
-                formatted_teeth.append(f"Tooth {tooth} - Only P - {sides['P']}")
-            elif 'B' in sides:
-                formatted_teeth.append(f"Tooth {tooth} - Only B - {sides['B']}")
+        first_dates['formatted'] = np.select(
+            [date_b.notna() & date_p.notna() & (date_b == date_p),
+             date_b.notna() & date_p.notna(),
+             date_p.notna()],
+            [tooth + ' - B & P - ' + date_p,
+             tooth + ' - (B - ' + date_b + ') / (P - ' + date_p + ')',
+             tooth + ' - Only P - ' + date_p],
+            default=tooth + ' - Only B - ' + date_b
+        )
 
         # Join the formatted teeth list with line breaks for HTML
-        return '<br>'.join(formatted_teeth).strip(', ')
+        return (
+            first_dates.groupby('ResearchID', observed=True, sort=False)['formatted']
+            .agg('<br>'.join)
+            .reindex(research_ids, fill_value='')
+        )
 
-    return pd.Series({
+    return pd.DataFrame({
         'Missing Teeth In Pockets Data, And Is Recorded In Patient Report (Likely Missing)':
             aggregate_column('Missing Teeth In Pockets Data, And Is Recorded In Patient Report (Likely Missing)'),
         'Missing Teeth In Pockets Data, But Not In Patient Report':
@@ -164,61 +229,34 @@ def aggregate_issues(group):
             aggregate_column('Missing Teeth In Pockets Data, Other Issues'),
         'Teeth Integer Data Is Not Complete':
             aggregate_column('Teeth Integer Data Is Not Complete')
-    })
+    }, index=research_ids)
 
-def highlight_cells(full_df, index):
+def highlight_cells(combined_df, cells):
     """
-    Function to apply conditional formatting to cells.
-    Highlights cells based on certain conditions.
+    Build the conditional formatting for every cell of combined_df.
+    Yellow marks an incorrect integer format, green a confirmed missing tooth and
+    light coral a NaN value without confirmation.
     Args:
-        full_df (DataFrame): The complete DataFrame.
-        index (int): Index of the row to style.
+        combined_df (DataFrame): The complete DataFrame.
+        cells (dict): Boolean masks per issue, from classify_cells.
     Returns:
-        Series: A Series with styles for each cell in the row.
-    """
-    row = full_df.loc[index]
-    missing_teeth_dates = row['Missing Teeth with Dates']
-    chart_date_str = row['CHART DATE']
-    if chart_date_str is None:
-        return pd.Series('', index=row.index)
-
-    chart_date = datetime.strptime(chart_date_str, '%Y-%m-%d')
-    style = pd.Series('', index=row.index)
-
-    # Define the standard pattern for validation
-    standard_pattern = re.compile(r'^\s*\d{1,2}(?:\s{1,2}\d{1,2}){2}\s*$')
+        DataFrame: Styles for each cell, with the same shape as combined_df.
+    """
+    style_codes = np.select(
+        [cells['integer_error'].to_numpy(),
+         cells['missing_and_record'].to_numpy(),
+         (cells['missing_not_record'] | cells['missing_other_issue']).to_numpy()],
+        [1, 2, 3],
+        default=0
+    )
+    styles = (
+        pd.DataFrame(CELL_STYLES[style_codes], index=combined_df.index, columns=cells['integer_error'].columns)
+        .reindex(columns=combined_df.columns, fill_value='')
+    )
 
-    # Iterate through each cell in the row
-    for col in row.index:
-        if col.startswith("Tooth") and (" P" in col or " B" in col):
-            tooth_match = re.search(r'Tooth (\d{1,2})', col)
-            if not tooth_match:
-                continue
-            tooth_num = tooth_match.group(1)
-            cell_value = row[col]
-
-            # Yellow Highlight: Incorrect integer format
-            if pd.notna(cell_value) and not standard_pattern.match(str(cell_value)):
-                style[col] = 'background-color: #FFFF00'
-                continue  # Skip to next cell since yellow takes precedence
-
-            # Green Highlight: Confirmed missing tooth
-            is_missing_tooth = any(
-                tooth == tooth_num and missing_date <= chart_date
-                for missing_date, tooth in missing_teeth_dates
-            )
-            if is_missing_tooth:
-                style[col] = 'background-color: green'
-                continue  # Skip to next cell if highlighted green
-
-            # Red/Orange Highlight: NaN values
-            if pd.isna(cell_value):
-                if is_missing_tooth:
-                    style[col] = 'background-color: orange'  # Confirmed missing but NaN
-                else:
-                    style[col] = 'background-color: lightcoral'  # Missing without confirmation
-
-    return style
+    # Rows without a chart date are left unstyled
+    styles.loc[combined_df['CHART DATE DT'].isna()] = ''
+    return styles
 
 def add_line_breaks(text):
     """
@@ -234,38 +272,61 @@ def add_line_breaks(text):
 # HTML Generation Functions
 # -----------------------
 
-def generate_research_groups(group_df, summary_df, combined_df, search_page=False, use_search_static_table=False):
+def render_research_tables(group_df, styles_df):
     """
-    Generate HTML content for each ResearchID within a Data_Type.
+    Render the styled pockets data table for each ResearchID within a Data_Type.
+    The whole Data_Type is rendered with a single Styler and its rows are then split per ResearchID.
+    The tables are shared by the analysis and search pages, so they are only rendered once.
     Args:
         group_df (DataFrame): Grouped DataFrame by Data_Type.
-        search_page (bool): Flag to adjust display properties for the search page.
-        use_search_static_table (bool): Flag to use the static table formatting from the search page.
+        styles_df (DataFrame): Styles for each cell of group_df, from highlight_cells.
     Returns:
-        str: HTML content for research groups.
+        tuple: The shared <style> block, and a dict with the HTML table for each ResearchID.
+    """
+    # Hidden columns are dropped before styling, and cell styles are only applied when there are any
+    visible_columns = group_df.columns.difference(columns_to_hide, sort=False)
+    styles_df = styles_df[visible_columns]
+    styler = group_df[visible_columns].style.hide(axis="index")
+    if styles_df.ne('').any(axis=None):
+        styler = styler.apply(lambda _: styles_df, axis=None)
+    styled_html = styler.to_html(index=False, escape=False)
+
+    # Split the rendered table into the style block, the header, the body rows and the closing tags
+    table_styles, table_html = styled_html.split('<table', 1)
+    table_head, table_body = table_html.split('<tbody>\n', 1)
+    table_rows, table_tail = table_body.split('  </tbody>\n', 1)
+    # The header is repeated in every ResearchID table, so its ids are dropped to keep them unique on the page
+    # (the style block only targets the body cell ids)
+    table_head = ELEMENT_ID_RE.sub('', '<table' + table_head + '<tbody>\n')
+    table_tail = '  </tbody>\n' + table_tail
+    table_rows = TABLE_ROW_RE.findall(table_rows)
+    if len(table_rows) != len(group_df):
+        raise ValueError(f"Found {len(table_rows)} rendered rows for {len(group_df)} rows of data")
+
+    styled_tables = {}
+    for research_id, positions in group_df.groupby("ResearchID", observed=True, sort=False).indices.items():
+        styled_tables[research_id] = table_head + ''.join(table_rows[i] for i in positions) + table_tail
+    return table_styles, styled_tables
+
+def write_research_groups(file, styled_tables, summary_df, static_sections, search_page=False):
+    """
+    Write the HTML content for each ResearchID within a Data_Type.
+    Args:
+        file (file): Open HTML file to write to.
+        styled_tables (dict): HTML table for each ResearchID, from render_research_tables.
+        summary_df (DataFrame): Summary DataFrame with aggregated issues, indexed by ResearchID.
+        static_sections (dict): Static summary table HTML for each ResearchID.
+        search_page (bool): Flag to adjust display properties for the search page.
     """
-    content = ''
-    for research_id, research_group in group_df.groupby("ResearchID"):
+    for research_id, styled_table in styled_tables.items():
         # Get the summary data for this ResearchID
-        summary = summary_df[summary_df['ResearchID'] == research_id].iloc[0]
-
-        # Prepare the table for the research group
-        styled_table = (
-            research_group.iloc[:, 0:43]
-            .style.apply(lambda row: highlight_cells(combined_df, row.name), axis=1)
-            .hide(axis="index")
-            .hide(columns_to_hide, axis="columns")
-            .to_html(index=False, escape=False)
-        )
+        summary = summary_df.loc[research_id]
 
         # Adjust display style for search page
         display_style = 'display: none;' if search_page else ''
 
-        # Generate static section using the static table formatting from the search page
-        static_section = generate_static_section(summary, use_search_static_table)
-
         # Container for this research group
-        research_container = f"""
+        file.write(f"""
         <div class="research-container" data-researchid="{research_id}" style="{display_style}">
             <h3>ResearchID {research_id}</h3>
             <p><b>Missing Issues:</b><br>{summary['Missing Teeth In Pockets Data, And Is Recorded In Patient Report (Likely Missing)']}</p>
@@ -273,11 +334,9 @@ def generate_research_groups(group_df, summary_df, combined_df, search_page=Fals
             <div class='scrollable-table'>
                 {styled_table}
             </div>
-            {static_section}
+            {static_sections[research_id]}
         </div>
-        """
-        content += research_container
-    return content
+        """)
 
 def generate_static_section(summary, use_search_static_table):
     """
@@ -376,33 +435,35 @@ def generate_summary_page(filtered_aggregated_df):
     </html>
     """
 
-    # Generate table rows
-    table_rows = ""
-    for _, row in filtered_aggregated_df.iterrows():
-        table_rows += f"""
+    # Generate table rows, concatenating whole columns at once
+    table_rows = (
+        """
                         <tr>
-                            <td>{row['ResearchID']}</td>
-                            <td>{row['Missing Teeth In Pockets Data, But Not In Patient Report']}</td>
-                            <td>{row['Missing Teeth In Pockets Data, Other Issues']}</td>
-                            <td>{row['Teeth Integer Data Is Not Complete']}</td>
+                            <td>""" + filtered_aggregated_df['ResearchID'].astype(str) + """</td>
+                            <td>""" + filtered_aggregated_df['Missing Teeth In Pockets Data, But Not In Patient Report'] + """</td>
+                            <td>""" + filtered_aggregated_df['Missing Teeth In Pockets Data, Other Issues'] + """</td>
+                            <td>""" + filtered_aggregated_df['Teeth Integer Data Is Not Complete'] + """</td>
                         </tr>
         """
+    ).str.cat()
 
-    # Complete the HTML content
-    html_content = html_template.format(table_rows=table_rows)
-
-    # Write the HTML content to the file
+    # Write the HTML content to the file, around the table rows
+    html_prefix, html_suffix = html_template.split('{table_rows}')
     with open(html_file_path, "w") as file:
-        file.write(html_content)
+        file.write(html_prefix.format())
+        file.write(table_rows)
+        file.write(html_suffix.format())
 
     return html_file_path
 
-def generate_analysis_page(combined_df, summary_df):
+def generate_analysis_page(combined_df, summary_df, research_tables, static_sections):
     """
     Generate the Analysis Report HTML page.
     Args:
         combined_df (DataFrame): The complete DataFrame.
-        summary_df (DataFrame): Summary DataFrame with aggregated issues.
+        summary_df (DataFrame): Summary DataFrame with aggregated issues, indexed by ResearchID.
+        research_tables (dict): Style block and styled tables per ResearchID for each Data_Type.
+        static_sections (dict): Static summary table HTML for each ResearchID.
     Returns:
         str: File path of the generated HTML file.
     """
@@ -475,38 +536,32 @@ def generate_analysis_page(combined_df, summary_df):
     </div>
     """
 
-    # Generate Data Type Containers
-    data_type_containers = ''
-    for data_type, group_df in combined_df.groupby("Data_Type"):
-        container_content = f"""
+    # Write the HTML file one fragment at a time, streaming the Data Type containers
+    html_prefix, html_suffix = html_template.split('{data_type_containers}')
+    with open(html_file_path, "w") as file:
+        file.write(html_prefix.format(styles=styles, script=script, header_bar=header_bar))
+        for data_type, (table_styles, styled_tables) in research_tables.items():
+            file.write(f"""
         <div class="container" id="container-{data_type}">
             <h2>Data Type: {data_type}</h2>
-            {generate_research_groups(group_df, summary_df, combined_df, use_search_static_table=True)}
+            {table_styles}
+            """)
+            write_research_groups(file, styled_tables, summary_df, static_sections)
+            file.write("""
         </div>
-        """
-        data_type_containers += container_content
-
-    # Generate the full HTML content
-    html_content = html_template.format(
-        styles=styles,
-        script=script,
-        header_bar=header_bar,
-        data_type_containers=data_type_containers
-    )
-
-    # Write to the HTML file
-    with open(html_file_path, "w") as file:
-        file.write(html_content)
+        """)
+        file.write(html_suffix)
 
     return html_file_path
 
 
-def generate_search_page(combined_df, summary_df):
+def generate_search_page(summary_df, research_tables, static_sections):
     """
     Generate the Search Report HTML page.
     Args:
-        combined_df (DataFrame): The complete DataFrame.
-        summary_df (DataFrame): Summary DataFrame with aggregated issues.
+        summary_df (DataFrame): Summary DataFrame with aggregated issues, indexed by ResearchID.
+        research_tables (dict): Style block and styled tables per ResearchID for each Data_Type.
+        static_sections (dict): Static summary table HTML for each ResearchID.
     Returns:
         str: File path of the generated HTML file.
     """
@@ -621,28 +676,21 @@ def generate_search_page(combined_df, summary_df):
     </div>
     """
 
-    # Generate Data Type Containers
-    data_type_containers = ''
-    for data_type, group_df in combined_df.groupby("Data_Type"):
-        container_content = f"""
+    # Write the HTML file one fragment at a time, streaming the Data Type containers
+    html_prefix, html_suffix = html_template.split('{data_type_containers}')
+    with open(html_file_path, "w") as file:
+        file.write(html_prefix.format(styles=styles, script=script, header_bar=header_bar))
+        for data_type, (table_styles, styled_tables) in research_tables.items():
+            file.write(f"""
         <div class="container" id="container-{data_type}">
             <h2>Data Type: {data_type}</h2>
-            {generate_research_groups(group_df, summary_df, combined_df, search_page=True, use_search_static_table=True)}
+            {table_styles}
+            """)
+            write_research_groups(file, styled_tables, summary_df, static_sections, search_page=True)
+            file.write("""
         </div>
-        """
-        data_type_containers += container_content
-
-    # Generate the full HTML content
-    html_content = html_template.format(
-        styles=styles,
-        script=script,
-        header_bar=header_bar,
-        data_type_containers=data_type_containers
-    )
-
-    # Write to the HTML file
-    with open(html_file_path, "w") as file:
-        file.write(html_content)
+        """)
+        file.write(html_suffix)
 
     return html_file_path
 
@@ -663,60 +711,75 @@ def open_summary_page():
 
 def main():
     # Load Data
-    missing_snapshots_df, pockets_snapshots_df, recessions_snapshots_df = load_data()
-
-    # Merge DataFrames
-    combined_df = pockets_snapshots_df.merge(
-        missing_snapshots_df[['ResearchID', 'Missing Issues']],
-        on='ResearchID',
-        how='left'
+    missing_snapshots_df, pockets_snapshots_df = load_data()
+
+    # Parse the missing teeth once per patient, then map them onto every snapshot of that patient
+    missing_issues = missing_snapshots_df.drop_duplicates('ResearchID').set_index('ResearchID')['Missing Issues']
+    missing_teeth = extract_missing_teeth_with_dates(replace_tooth_codes(missing_issues))
+    combined_df = pockets_snapshots_df.copy()
+    combined_df['Missing Teeth with Dates'] = combined_df['ResearchID'].map(missing_teeth).apply(
+        lambda x: x if isinstance(x, list) else []
     )
 
-    # Clean and Format Data
-    combined_df['Missing Issues'] = combined_df['Missing Issues'].apply(
-        lambda x: replace_tooth_codes(x) if isinstance(x, str) else x
-    )
-    combined_df['CHART DATE'] = pd.to_datetime(combined_df['CHART DATE']).dt.strftime('%Y-%m-%d')
-    combined_df = combined_df.sort_values(by=['ResearchID', 'CHART DATE']).reset_index(drop=True)
-    combined_df['Missing Teeth with Dates'] = combined_df['Missing Issues'].apply(extract_missing_teeth_with_dates)
+    # Group keys as categoricals, so groupby works on integer codes
+    combined_df['ResearchID'] = combined_df['ResearchID'].astype('category')
+    combined_df['Data_Type'] = combined_df['Data_Type'].astype('category')
 
-    # Initialize Columns
-    combined_df['Missing Teeth In Pockets Data, And Is Recorded In Patient Report (Likely Missing)'] = ''
-    combined_df['Missing Teeth In Pockets Data, But Not In Patient Report'] = ''
-    combined_df['Missing Teeth In Pockets Data, Other Issues'] = ''
-    combined_df['Teeth Integer Data Is Not Complete'] = ''
+    # Parse chart dates once; the string form is only kept for display
+    combined_df['CHART DATE DT'] = pd.to_datetime(combined_df['CHART DATE'], cache=True)
+    combined_df['CHART DATE'] = combined_df['CHART DATE DT'].dt.strftime('%Y-%m-%d')
+    combined_df = combined_df.sort_values(by=['ResearchID', 'CHART DATE DT']).reset_index(drop=True)
 
-    # Apply record_cells function to each row
-    combined_df.apply(lambda row: record_cells(row, combined_df), axis=1)
+    # Record issues for every row
+    cells = classify_cells(combined_df)
+    issues_df = record_cells(combined_df, cells)
+    combined_df[issues_df.columns] = issues_df
 
     # Create Summary DataFrame
-    summary_df = combined_df.groupby('ResearchID').apply(aggregate_issues).reset_index()
+    summary_df = aggregate_issues(combined_df)
 
     # Filter for Summary Report
-    aggregated_df = combined_df.groupby('ResearchID').apply(aggregate_issues).reset_index()
-    filtered_aggregated_df = aggregated_df[
-        aggregated_df[['Missing Teeth In Pockets Data, But Not In Patient Report',
+    summary_columns = ['Missing Teeth In Pockets Data, But Not In Patient Report',
                        'Missing Teeth In Pockets Data, Other Issues',
-                       'Teeth Integer Data Is Not Complete']].apply(lambda x: x.str.strip() != '').any(axis=1)
-    ]
+                       'Teeth Integer Data Is Not Complete']
+    has_issues = np.zeros(len(summary_df), dtype=bool)
+    for column in summary_columns:
+        has_issues |= summary_df[column].str.strip().ne('').to_numpy()
+    filtered_aggregated_df = summary_df[has_issues].reset_index()
 
     # Add Line Breaks for HTML Display
-    for column in ['Missing Teeth In Pockets Data, But Not In Patient Report',
-                   'Missing Teeth In Pockets Data, Other Issues',
-                   'Teeth Integer Data Is Not Complete']:
+    for column in summary_columns:
         filtered_aggregated_df[column] = filtered_aggregated_df[column].apply(add_line_breaks)
 
+    # Render the styled tables once for both the analysis and search pages,
+    # one Data_Type per worker process
+    styles_df = highlight_cells(combined_df, cells)
+    data_types, group_dfs = zip(*combined_df.groupby("Data_Type", observed=True))
+    with ProcessPoolExecutor() as executor:
+        rendered = executor.map(
+            render_research_tables,
+            group_dfs,
+            [styles_df.loc[group_df.index] for group_df in group_dfs]
+        )
+        research_tables = dict(zip(data_types, rendered))
+
+    # Static summary tables are identical on both pages, so build each one once
+    static_sections = {
+        research_id: generate_static_section(summary, use_search_static_table=True)
+        for research_id, summary in summary_df.iterrows()
+    }
+
     # Generate HTML Reports
     generate_summary_page(filtered_aggregated_df)
-    generate_analysis_page(combined_df, summary_df)
-    generate_search_page(combined_df, summary_df)
+    generate_analysis_page(combined_df, summary_df, research_tables, static_sections)
+    generate_search_page(summary_df, research_tables, static_sections)
 
     # Open the Summary page in Safari
     open_summary_page()
 
 # List of columns to hide in the tables
 columns_to_hide = [
-    'Missing Issues', 'Data_Type',
+    'Data_Type', 'CHART DATE DT',
     'Missing Teeth In Pockets Data, And Is Recorded In Patient Report (Likely Missing)',
     'Missing Teeth with Dates', 
     'Missing Teeth In Pockets Data, But Not In Patient Report', 
@@ -0,0 +1,49 @@
+import hashlib
+import os
+import pickle
+from functools import lru_cache
+import pandas as pd
+
+# Parsed Excel workbooks are cached here, one pickle file per workbook path
+CACHE_DIR = "Data_PKL/Excel Cache"
+
+@lru_cache(maxsize=None)
+def load_excel_cached(path):
+    """
+    Load an Excel workbook, reusing a pickled copy of it while that copy is newer than the workbook.
+    The result is also kept in memory, so callers must not modify it in place.
+    Args:
+        path (str): Path of the Excel workbook.
+    Returns:
+        DataFrame: Contents of the first sheet of the workbook.
+    """
+    # The cache file is keyed on the full path, so workbooks with the same name in different folders do not collide
+    path_hash = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:12]
+    cache_path = os.path.join(CACHE_DIR, f"{os.path.splitext(os.path.basename(path))[0]}_{path_hash}.pkl")
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(path):
+        with open(cache_path, "rb") as f:
+            return pickle.load(f)
+
+    # calamine (python-calamine) parses workbooks much faster than the default openpyxl engine
+    df = pd.read_excel(path, engine="calamine")
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(cache_path, "wb") as f:
+        pickle.dump(df, f)
+    return df
+
+# -----------------------
+# Snapshot Workbooks
+# -----------------------
+# Each call returns a fresh copy, since the scripts modify their frames in place
+
+def load_pockets():
+    """Load a copy of the pockets snapshot workbook."""
+    return load_excel_cached('Data/Pockets_snapshot.xlsx').copy()
+
+def load_missing():
+    """Load a copy of the missing teeth snapshot workbook."""
+    return load_excel_cached('Data/Missing_snapshot.xlsx').copy()
+
+def load_recessions():
+    """Load a copy of the recessions snapshot workbook."""
+    return load_excel_cached('Data/Recessions_snapshot.xlsx').copy()
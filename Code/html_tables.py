@@ -0,0 +1,29 @@
+# Tabs and line breaks inside a cell are shown escaped, as DataFrame.to_html does
+CELL_ESCAPES = str.maketrans({"\t": r"\t", "\n": r"\n", "\r": r"\r"})
+
+def format_cell(value):
+    """
+    Format a value as the text of a table cell.
+    Args:
+        value: Cell value.
+    Returns:
+        str: Cell text, escaped and without surrounding whitespace.
+    """
+    return str(value).translate(CELL_ESCAPES).strip()
+
+def write_html_table(file, df):
+    """
+    Write a DataFrame to an open HTML file as a table, streaming it row by row.
+    The markup is the same as DataFrame.to_html(index=False, escape=False) for frames of text and integer cells.
+    Args:
+        file (file): Open HTML file to write to.
+        df (DataFrame): Table to write.
+    """
+    file.write('<table border="1" class="dataframe">\n  <thead>\n    <tr style="text-align: right;">\n')
+    file.writelines(f"      <th>{column}</th>\n" for column in df.columns)
+    file.write("    </tr>\n  </thead>\n  <tbody>\n")
+    file.writelines(
+        "    <tr>\n" + "".join(f"      <td>{format_cell(value)}</td>\n" for value in row) + "    </tr>\n"
+        for row in df.itertuples(index=False, name=None)
+    )
+    file.write("  </tbody>\n</table>")
@@ -1,12 +1,12 @@
 import pandas as pd
+import numpy as np
 import subprocess
 import pickle
+from data_loader import load_missing
+from html_tables import write_html_table
 
-# Loading Excel files
-demographic_data = pd.read_excel('Data/DemographicData_snapshot.xlsx')
-pockets_data = pd.read_excel('Data/Pockets_snapshot.xlsx')
-missing_ss_data = pd.read_excel('Data/Missing_snapshot.xlsx')
-recessions_data = pd.read_excel('Data/Recessions_snapshot.xlsx')
+# Loading Excel file
+missing_ss_data = load_missing()
 
 # Define the columns to check
 columns_to_check = missing_ss_data.loc[:, 'T18 NOTES':'T28 SURFACES'].columns
@@ -18,50 +18,43 @@ missing_data_long = missing_ss_data.melt(id_vars=['ResearchID', 'CHART DATE'],
                                          value_name='Value')
 
 # Split into "Missing" and "Else" entries
-missing_entries = missing_data_long[missing_data_long['Value'] == 'Missing']
-else_entries = missing_data_long[(missing_data_long['Value'] != 'Missing') & (pd.notna(missing_data_long['Value']))]
+# Values are encoded once as integer codes (-1 for NaN), and both filters compare the codes
+value_codes, value_uniques = pd.factorize(missing_data_long['Value'])
+is_missing = np.append(value_uniques == 'Missing', False)[value_codes]
+missing_entries = missing_data_long[is_missing]
+else_entries = missing_data_long[~is_missing & (value_codes >= 0)]
 
-# Group and format the "Missing" entries, keeping only the first instance per ResearchID and Tooth Column
-missing_grouped = (
-    missing_entries.sort_values(['ResearchID', 'CHART DATE'])
-    .drop_duplicates(subset=['ResearchID', 'Tooth_Column'], keep='first')
-    .groupby('ResearchID')
-    .apply(
-        lambda x: "<br>".join(
-            f"{row['CHART DATE']} - {row['Tooth_Column']} - {row['Value']}"
-            for _, row in x.iterrows()
-        )
+def group_first_entries(entries, name):
+    # Keep only the first instance per ResearchID and Tooth Column, then join each ResearchID's entries into one cell
+    first_entries = (
+        entries.sort_values(['ResearchID', 'CHART DATE'])
+        .drop_duplicates(subset=['ResearchID', 'Tooth_Column'], keep='first')
     )
-    .reset_index(name='Missing Issues')
-)
-
-# Group and format the "Else" entries, keeping only the first instance per ResearchID and Tooth Column
-else_grouped = (
-    else_entries.sort_values(['ResearchID', 'CHART DATE'])
-    .drop_duplicates(subset=['ResearchID', 'Tooth_Column'], keep='first')
-    .groupby('ResearchID')
-    .apply(
-        lambda x: "<br>".join(
-            f"{row['CHART DATE']} - {row['Tooth_Column']} - {row['Value']}"
-            for _, row in x.iterrows()
-        )
+    display = (
+        first_entries['CHART DATE'].map(str) + " - "
+        + first_entries['Tooth_Column'] + " - "
+        + first_entries['Value'].map(str)
+    )
+    return (
+        display.groupby(first_entries['ResearchID'])
+        .agg("<br>".join)
+        .reset_index(name=name)
     )
-    .reset_index(name='Other Issues')
-)
+
+# Group and format the "Missing" entries
+missing_grouped = group_first_entries(missing_entries, 'Missing Issues')
+
+# Group and format the "Else" entries
+else_grouped = group_first_entries(else_entries, 'Other Issues')
 
 # Merge the two grouped results
 final_grouped = pd.merge(missing_grouped, else_grouped, on='ResearchID', how='outer')
 
 # Fill any NaN values in missing or other issues with appropriate placeholders
-final_grouped.fillna({'Missing Issues': "No missing teeth", 'Other Issues': "No other issues"}, inplace=True)
+final_grouped = final_grouped.fillna({'Missing Issues': "No missing teeth", 'Other Issues': "No other issues"})
 
-# Define the output HTML file path
-html_file_path = "Data Reports HTML/missing_snapshots_summary.html"
-
-# Open the file for writing
-with open(html_file_path, "w") as file:
-    # HTML header with main title and styles
-    file.write("""
+# Page header and styles of the HTML report
+html_header = """
     <html>
     <head>
         <title>Patient History Report</title>
@@ -109,29 +102,38 @@ with open(html_file_path, "w") as file:
         </style>
     </head>
     <body>
-    """)
+    """
+
+if __name__ == "__main__":
+    # Define the output HTML file path
+    html_file_path = "Data Reports HTML/missing_snapshots_summary.html"
+
+    # Open the file for writing
+    with open(html_file_path, "w", buffering=1 << 20) as file:
+        # HTML header with main title and styles
+        file.write(html_header)
 
-    # Add the main title
-    file.write("<h1>Patient Report History</h1>")
+        # Add the main title
+        file.write("<h1>Patient Report History</h1>")
     
-    # Teeth Data Summary content
-    file.write("<div class='container'>")
-    file.write("<h2>Patient Report History</h2>")
-    file.write("<p>Summaries of missing teeth and other reported issues for each ResearchID.</p>")
+        # Teeth Data Summary content
+        file.write("<div class='container'>")
+        file.write("<h2>Patient Report History</h2>")
+        file.write("<p>Summaries of missing teeth and other reported issues for each ResearchID.</p>")
     
-    # Write final_grouped DataFrame to HTML
-    file.write(final_grouped.to_html(index=False, escape=False))
+        # Write final_grouped DataFrame to HTML
+        write_html_table(file, final_grouped)
     
-    # Close container and body tags
-    file.write("</div></body></html>")
+        # Close container and body tags
+        file.write("</div></body></html>")
 
-# Attempt to open the file in Safari
-try:
-    subprocess.run(["open", "-a", "Safari", html_file_path])
-    print(f"HTML file created and opened in Safari: {html_file_path}")
-except Exception as e:
-    print("Could not open Safari. Error:", e)
+    # Attempt to open the file in Safari
+    try:
+        subprocess.run(["open", "-a", "Safari", html_file_path])
+        print(f"HTML file created and opened in Safari: {html_file_path}")
+    except Exception as e:
+        print("Could not open Safari. Error:", e)
 
-# Saving data in pkl file for external use in Cross-Validation
-with open("Data_PKL/missing_snapshots.pkl", "wb") as f:
-    pickle.dump(final_grouped, f)
\ No newline at end of file
+    # Saving data in pkl file for external use in Cross-Validation
+    with open("Data_PKL/missing_snapshots.pkl", "wb") as f:
+        pickle.dump(final_grouped, f)
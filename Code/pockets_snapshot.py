@@ -3,12 +3,11 @@ import subprocess
 import numpy as np
 import re
 import pickle
+from data_loader import load_pockets
+from html_tables import write_html_table
 
-### --- Loading Excel files --- ###
-demographic_data = pd.read_excel('Data/DemographicData_snapshot.xlsx')
-pockets_data = pd.read_excel('Data/Pockets_snapshot.xlsx')
-missing_ss_data = pd.read_excel('Data/Missing_snapshot.xlsx')
-recessions_data = pd.read_excel('Data/Recessions_snapshot.xlsx')
+### --- Loading Excel file --- ###
+pockets_data = load_pockets()
 
 ### --- Pockets Snapshot Summary --- ###
 
@@ -16,14 +15,19 @@ recessions_data = pd.read_excel('Data/Recessions_snapshot.xlsx')
 column_range = pockets_data.loc[:, 'Tooth 18 B':'Tooth 28 P'].columns # These are the columns we would like to check.
 pattern = re.compile(r'^\s*\d{1,2}(?:\s{1,2}\d{1,2}){2}\s*$') # Standard format of most of the dataset: "x  y  z "
 pockets_data[column_range] = pockets_data[column_range].replace(r'^\s*$', np.nan, regex=True) # Standardize empty or whitespace-only values to NaN
+tooth_codes, tooth_values = pd.factorize(pockets_data[column_range].to_numpy().ravel()) # Tooth values as integer codes into tooth_values, -1 for NaN
+tooth_codes = pd.DataFrame(tooth_codes.reshape(-1, len(column_range)), index=pockets_data.index, columns=column_range)
+is_missing_tooth = tooth_codes < 0 # NaN tooth cells, shared by the checks below
+value_matches = pd.Series(tooth_values, dtype=object).astype(str).str.match(pattern).to_numpy(dtype=bool) # Pattern is matched once per distinct tooth value
+pattern_matches = pd.DataFrame(np.append(value_matches, False)[tooth_codes.to_numpy()], index=pockets_data.index, columns=column_range) # Per cell, NaN (code -1) never matches; the checks below look up their rows here
 
 ## --- Datatype 1: No Missing Data At All --- ##
 ## All teeth data exists per patient; no missingness. ##
 
-def row_matches_pattern(row):
-    # Function to check if all values in the row pattern above #
-    return all(pattern.match(str(row[col])) for col in column_range)
-no_missing_data = pockets_data[pockets_data.apply(row_matches_pattern, axis=1)]
+def rows_match_pattern(data):
+    # Function to check which rows have all values matching the pattern above #
+    return pattern_matches.loc[data.index].all(axis=1)
+no_missing_data = pockets_data[rows_match_pattern(pockets_data)]
 no_missing_ids = no_missing_data['ResearchID'].unique()
 pockets_data = pockets_data[~pockets_data['ResearchID'].isin(no_missing_ids)] 
 
@@ -31,33 +35,35 @@ pockets_data = pockets_data[~pockets_data['ResearchID'].isin(no_missing_ids)]
 ## --- Datatype 2: Integer-Type Missing Data --- ##
 ## Patients that have cells that are not complete with three integers ##
 
-def row_does_not_match_pattern(row):
-    # Check each cell in the row to see if it is not NaN and does not match the pattern
-    for col in column_range:
-        cell_value = row[col]
-        # If the cell is not NaN and does not match the pattern, it does not match
-        if pd.notna(cell_value) and not pattern.match(str(cell_value)):
-            return True
-    return False
-systematic_missing_data = pockets_data[pockets_data.apply(row_does_not_match_pattern, axis=1)]
+def rows_do_not_match_pattern(data):
+    # Find the rows with a cell that is not NaN and does not match the pattern
+    return (~is_missing_tooth.loc[data.index] & ~pattern_matches.loc[data.index]).any(axis=1)
+systematic_missing_data = pockets_data[rows_do_not_match_pattern(pockets_data)]
 systematic_missing_ids = systematic_missing_data['ResearchID'].unique()
 pockets_data = pockets_data[~pockets_data['ResearchID'].isin(systematic_missing_ids)]
 
 ## --- Datatype 3: Consistent Missing Data --- ##
 ## Patients where the data for missing teeth is consistent among all visits ##
 
-def is_fully_consistent_missing_teeth(row):
-    research_id = row['ResearchID']
-    group = pockets_data[pockets_data['ResearchID'] == research_id]
-    if len(group) <= 1:
-        return False
-    for col in column_range:
-        if group[col].isna().all():
-            continue
-        elif not group[col].isna().all() and not group[col].notna().all():
-            return False  # Inconsistent missing data in this column
-    return True
-consistent_missing_data = pockets_data[pockets_data.apply(is_fully_consistent_missing_teeth, axis=1)]
+def inconsistent_missing_columns(data):
+    # For each row, flag the columns that are missing in some visits of its ResearchID but not in others
+    # Count the missing visits of each ResearchID and column, then compare them with its number of visits
+    is_missing = is_missing_tooth.loc[data.index].to_numpy()
+    group_codes, research_ids = pd.factorize(data['ResearchID'])
+    has_id = group_codes >= 0  # Rows without a ResearchID (code -1) belong to no patient and are never flagged
+    missing_counts = np.zeros((len(research_ids), is_missing.shape[1]), dtype=np.int64)
+    np.add.at(missing_counts, group_codes[has_id], is_missing[has_id])
+    visit_counts = np.bincount(group_codes[has_id], minlength=len(research_ids))
+    row_missing_counts = missing_counts[group_codes]
+    return has_id[:, None] & (row_missing_counts > 0) & (row_missing_counts < visit_counts[group_codes, None])
+
+def has_multiple_visits(data):
+    # Flag the rows whose ResearchID has more than one visit
+    return data.groupby('ResearchID')['ResearchID'].transform('size') > 1
+
+def is_fully_consistent_missing_teeth(data):
+    return has_multiple_visits(data) & ~inconsistent_missing_columns(data).any(axis=1)
+consistent_missing_data = pockets_data[is_fully_consistent_missing_teeth(pockets_data)]
 consistent_missing_ids = consistent_missing_data['ResearchID'].unique()
 pockets_data = pockets_data[~pockets_data['ResearchID'].isin(consistent_missing_ids)]
 
@@ -65,19 +71,10 @@ pockets_data = pockets_data[~pockets_data['ResearchID'].isin(consistent_missing_
 ## --- Datatype 4: Inconsistent Missing Data --- ##
 ## Patients where the data for missing teeth is not consistent among all visits; some visits report the teeth, others do not. ##
 
-def is_inconsistent_missing_teeth(row):
-    research_id = row['ResearchID']
-    group = pockets_data[pockets_data['ResearchID'] == research_id]
-    # Only consider multi-observation ResearchIDs
-    if len(group) <= 1:
-        return False
-    # Check each column for inconsistent missing data
-    for col in column_range:
-        # If a column has a mix of NaN and non-NaN values, mark as inconsistent
-        if not group[col].isna().all() and not group[col].notna().all():
-            return True  # Inconsistent data in this column
-    return False
-inconsistent_missing_data = pockets_data[pockets_data.apply(is_inconsistent_missing_teeth, axis=1)]
+def is_inconsistent_missing_teeth(data):
+    # Only consider multi-observation ResearchIDs with a mix of NaN and non-NaN values in some column
+    return has_multiple_visits(data) & inconsistent_missing_columns(data).any(axis=1)
+inconsistent_missing_data = pockets_data[is_inconsistent_missing_teeth(pockets_data)]
 inconsistent_ids = inconsistent_missing_data['ResearchID'].unique()
 pockets_data = pockets_data[~pockets_data['ResearchID'].isin(inconsistent_ids)]
 
@@ -94,65 +91,67 @@ pockets_data = pockets_data[~pockets_data['ResearchID'].isin(single_observation_
 remaining_data = pockets_data
 
 
+## --- All Datatypes --- ##
+## Each subset labelled with its datatype. The subsets share no patients, so they are summarized together. ##
+typed_data = pd.concat([no_missing_data.assign(Data_Type="No Missing Data"),
+                        systematic_missing_data.assign(Data_Type="Systematic Missing Data"),
+                        consistent_missing_data.assign(Data_Type="Consistent Missing Data"),
+                        inconsistent_missing_data.assign(Data_Type="Inconsistent Missing Data"),
+                        single_observation_data.assign(Data_Type="Single Observation Data"),
+                        remaining_data.assign(Data_Type="Other (Remaining Data)")])
+
+
 ### --- HTML Coding Below --- ###
-def format_integer_missing_teeth_data(group, column_range):
-    # Sort the group by 'CHART DATE' to ensure entries are ordered by date
-    group = group.sort_values(by='CHART DATE')
-    
-    # Dictionary to accumulate missing teeth by date
-    date_missing_teeth = {}
-    date_missing_integer_values = {}
-    
-    for _, row in group.iterrows():
-        chart_date = row['CHART DATE']
-        if chart_date not in date_missing_teeth:
-            date_missing_teeth[chart_date] = []
-            date_missing_integer_values[chart_date] = []
-        
-        # Add each missing or incomplete tooth for the current date
-        for col in column_range:
-            cell_value = row[col]
-            if pd.isna(cell_value):
-                # Fully missing tooth data
-                date_missing_teeth[chart_date].append(col)
-            elif not pattern.match(str(cell_value)):
-                # Tooth data with missing or incorrect integer format
-                date_missing_integer_values[chart_date].append(col)
-    
+def format_integer_missing_teeth_data(data, column_range):
+    # Sort by ResearchID and 'CHART DATE' to ensure entries are ordered by date
+    data = data.sort_values(by=['ResearchID', 'CHART DATE'], kind='stable')
+
+    # Flag fully missing tooth data, and tooth data with missing or incorrect integer format
+    is_missing = is_missing_tooth.loc[data.index].to_numpy()
+    is_incomplete = ~is_missing & ~pattern_matches.loc[data.index].to_numpy()
+
+    # One entry per ResearchID and date, numbered in date order
+    entry_keys = data.groupby(['ResearchID', 'CHART DATE'], sort=False, dropna=False).ngroup().to_numpy()
+    entries = data[['ResearchID', 'CHART DATE']].iloc[np.unique(entry_keys, return_index=True)[1]].reset_index(drop=True)
+
+    def join_teeth(mask):
+        # Accumulate the flagged teeth of each entry, in row and column order
+        rows, cols = np.nonzero(mask)
+        teeth = pd.Series(column_range[cols], index=entry_keys[rows], dtype=object)
+        return teeth.groupby(level=0).agg(', '.join).reindex(entries.index)
+
     # Format each date's missing teeth and missing integer values into single lines
-    formatted_lines = []
-    for date in date_missing_teeth.keys():
-        missing_teeth_str = f"{date} - Missing: ({', '.join(date_missing_teeth[date])})" if date_missing_teeth[date] else ""
-        missing_integer_values_str = f" ---> Missing Integer Values: ({', '.join(date_missing_integer_values[date])})<br>" if date_missing_integer_values[date] else ""
-        
-        # Combine both missing teeth and missing integer values for this date
-        combined_str = "<br>".join(filter(None, [missing_teeth_str, missing_integer_values_str]))
-        formatted_lines.append(combined_str)
-    
-    return "<br>".join(formatted_lines)
+    missing_teeth_str = (entries['CHART DATE'].map(str) + " - Missing: (" + join_teeth(is_missing) + ")").fillna("")
+    missing_integer_values_str = (" ---> Missing Integer Values: (" + join_teeth(is_incomplete) + ")<br>").fillna("")
+
+    # Combine both missing teeth and missing integer values for this date
+    separator = np.where((missing_teeth_str != "") & (missing_integer_values_str != ""), "<br>", "")
+    formatted_lines = missing_teeth_str + separator + missing_integer_values_str
+
+    return formatted_lines.groupby(entries['ResearchID']).agg("<br>".join)
 
 
 # Function to create a summary DataFrame for each datatype, with HTML line breaks for each entry
-def create_summary_df(data, column_range):
-    summary_data = []
-    for research_id, group in data.groupby('ResearchID'):
-        # Generate the missing data summary for each ResearchID
-        missing_data_summary = format_integer_missing_teeth_data(group, column_range)
-        summary_data.append({'ResearchID': research_id, 'Reported Issues': missing_data_summary})
-    return pd.DataFrame(summary_data)
-
-no_missing_data_summary = create_summary_df(no_missing_data, column_range)
-consistent_missing_teeth_summary = create_summary_df(consistent_missing_data, column_range)
-single_observation_summary = create_summary_df(single_observation_data, column_range)
-systematic_missing_summary = create_summary_df(systematic_missing_data, column_range)
-inconsistent_missing_summary = create_summary_df(inconsistent_missing_data, column_range)
-remaining_summary = create_summary_df(remaining_data, column_range)
-
-# Write the summaries to a single HTML file with line breaks for formatted display
-html_file_path = "pockets_snapshot.html"
-with open(html_file_path, "w") as file:
-    # Writing the HTML header with enhanced styles
-    file.write("""
+def create_summary_dfs(data, column_range):
+    # Generate the missing data summary for each ResearchID in one pass, then split it by datatype
+    summary = format_integer_missing_teeth_data(data, column_range).reset_index(name='Reported Issues')
+    data_types = summary['ResearchID'].map(data.groupby('ResearchID')['Data_Type'].first())
+    return {data_type: group.reset_index(drop=True) for data_type, group in summary.groupby(data_types)}
+
+# Datatypes without any patients get an empty table without columns
+summary_dfs = create_summary_dfs(typed_data, column_range)
+no_missing_data_summary = summary_dfs.get("No Missing Data", pd.DataFrame())
+consistent_missing_teeth_summary = summary_dfs.get("Consistent Missing Data", pd.DataFrame())
+single_observation_summary = summary_dfs.get("Single Observation Data", pd.DataFrame())
+systematic_missing_summary = summary_dfs.get("Systematic Missing Data", pd.DataFrame())
+inconsistent_missing_summary = summary_dfs.get("Inconsistent Missing Data", pd.DataFrame())
+remaining_summary = summary_dfs.get("Other (Remaining Data)", pd.DataFrame())
+
+# The labelled subsets, renumbered as one DataFrame
+pickle_df = typed_data.reset_index(drop=True)
+
+# Page header and styles of the HTML report
+html_header = """
     <html>
     <head>
         <title>Missing Teeth Data Summary</title>
@@ -208,83 +207,73 @@ with open(html_file_path, "w") as file:
         </style>
     </head>
     <body>
-    """)
+    """
+
+if __name__ == "__main__":
+    # Write the summaries to a single HTML file with line breaks for formatted display
+    html_file_path = "pockets_snapshot.html"
+    with open(html_file_path, "w", buffering=1 << 20) as file:
+        # Writing the HTML header with enhanced styles
+        file.write(html_header)
 
-    # Add the main title
-    file.write("<h1>Missing Teeth Data Summary</h1>")  # Main title with enhanced styling
+        # Add the main title
+        file.write("<h1>Missing Teeth Data Summary</h1>")  # Main title with enhanced styling
     
-    # Add a break and start the main content container
-    file.write("<div class='container'>")
-
-    # No Missing Data Summary (Full information)
-    file.write("<h2>Datatype 1: No Missing Data</h2>")
-    file.write("<p>These patients have complete records with no missing data across all teeth.</p>")
-    file.write(no_missing_data_summary.to_html(index=False, escape=False))
-    file.write("</div><br>")
-
-    # Consistently Missing Teeth Summary
-    file.write("<div class='container'>")
-    file.write("<h2>Datatype 2: Consistently Missing Teeth Data</h2>")
-    file.write("<p>Patients with consistent missing data across multiple visits for specific teeth.</p>")
-    file.write(consistent_missing_teeth_summary.to_html(index=False, escape=False))
-    file.write("</div><br>")
-
-    # Single Observation ResearchIDs
-    file.write("<div class='container'>")
-    file.write("<h2>Datatype 3: Single Observation ResearchIDs</h2>")
-    file.write("<p>Patients who only have one visit on record, limiting insights on data consistency.</p>")
-    file.write(single_observation_summary.to_html(index=False, escape=False))
-    file.write("</div><br>")
-
-    # Integer-Type Missing Data (systematic)
-    file.write("<div class='container'>")
-    file.write("<h2>Datatype 4: Integer-Type Missing Data</h2>")
-    file.write("<p>These records contain systematic errors where integer values are missing or improperly formatted.</p>")
-    file.write(systematic_missing_summary.to_html(index=False, escape=False))
-    file.write("</div><br>")
-
-    # Inconsistent Missing Data
-    file.write("<div class='container'>")
-    file.write("<h2>Datatype 5: Inconsistent Missing Data</h2>")
-    file.write("<p>Records with inconsistent missing data patterns across visits.</p>")
-    file.write(inconsistent_missing_summary.to_html(index=False, escape=False))
-    file.write("</div><br>")
-
-    # Other Data
-    file.write("<div class='container'>")
-    file.write("<h2>Datatype 6: Other Data (Remaining)</h2>")
-    file.write("<p>Records requiring further investigation due to unique data patterns.</p>")
-    file.write(remaining_summary.to_html(index=False, escape=False))
-    file.write("</div>")
-
-    # Closing the HTML tags
-    file.write("</body></html>")
-
-try:
-    subprocess.run(["open", "-a", "Safari", html_file_path])
-    print(f"HTML file created and opened in Safari: {html_file_path}")
-except Exception as e:
-    print(f"Could not open Safari. Error: {e}")
-
-# Creating a pickel file for cross-validation use.
-
-# Add a Data_Type column to each subset
-no_missing_data["Data_Type"] = "No Missing Data"
-systematic_missing_data["Data_Type"] = "Systematic Missing Data"
-consistent_missing_data["Data_Type"] = "Consistent Missing Data"
-inconsistent_missing_data["Data_Type"] = "Inconsistent Missing Data"
-single_observation_data["Data_Type"] = "Single Observation Data"
-remaining_data["Data_Type"] = "Other (Remaining Data)"
-
-# Concatenate all subsets into one DataFrame
-pickle_df = pd.concat([no_missing_data, 
-                       systematic_missing_data, 
-                       consistent_missing_data, 
-                       inconsistent_missing_data, 
-                       single_observation_data, 
-                       remaining_data], 
-                      ignore_index=True)
-
-# Save the concatenated DataFrame as a pickle file
-with open("Data_PKL/pockets_snapshots.pkl", "wb") as f:
-    pickle.dump(pickle_df, f)
\ No newline at end of file
+        # Add a break and start the main content container
+        file.write("<div class='container'>")
+
+        # No Missing Data Summary (Full information)
+        file.write("<h2>Datatype 1: No Missing Data</h2>")
+        file.write("<p>These patients have complete records with no missing data across all teeth.</p>")
+        write_html_table(file, no_missing_data_summary)
+        file.write("</div><br>")
+
+        # Consistently Missing Teeth Summary
+        file.write("<div class='container'>")
+        file.write("<h2>Datatype 2: Consistently Missing Teeth Data</h2>")
+        file.write("<p>Patients with consistent missing data across multiple visits for specific teeth.</p>")
+        write_html_table(file, consistent_missing_teeth_summary)
+        file.write("</div><br>")
+
+        # Single Observation ResearchIDs
+        file.write("<div class='container'>")
+        file.write("<h2>Datatype 3: Single Observation ResearchIDs</h2>")
+        file.write("<p>Patients who only have one visit on record, limiting insights on data consistency.</p>")
+        write_html_table(file, single_observation_summary)
+        file.write("</div><br>")
+
+        # Integer-Type Missing Data (systematic)
+        file.write("<div class='container'>")
+        file.write("<h2>Datatype 4: Integer-Type Missing Data</h2>")
+        file.write("<p>These records contain systematic errors where integer values are missing or improperly formatted.</p>")
+        write_html_table(file, systematic_missing_summary)
+        file.write("</div><br>")
+
+        # Inconsistent Missing Data
+        file.write("<div class='container'>")
+        file.write("<h2>Datatype 5: Inconsistent Missing Data</h2>")
+        file.write("<p>Records with inconsistent missing data patterns across visits.</p>")
+        write_html_table(file, inconsistent_missing_summary)
+        file.write("</div><br>")
+
+        # Other Data
+        file.write("<div class='container'>")
+        file.write("<h2>Datatype 6: Other Data (Remaining)</h2>")
+        file.write("<p>Records requiring further investigation due to unique data patterns.</p>")
+        write_html_table(file, remaining_summary)
+        file.write("</div>")
+
+        # Closing the HTML tags
+        file.write("</body></html>")
+
+    try:
+        subprocess.run(["open", "-a", "Safari", html_file_path])
+        print(f"HTML file created and opened in Safari: {html_file_path}")
+    except Exception as e:
+        print(f"Could not open Safari. Error: {e}")
+
+    # Creating a pickel file for cross-validation use.
+
+    # Save the concatenated DataFrame as a pickle file
+    with open("Data_PKL/pockets_snapshots.pkl", "wb") as f:
+        pickle.dump(pickle_df, f)
@@ -1,25 +1,23 @@
-import pandas as pd
+import numpy as np
 import torch
 from torch.utils.data import Dataset, DataLoader
+from data_loader import load_pockets
 
-file_path = 'data/Pockets_snapshot.xlsx'
-df = pd.read_excel(file_path)
+df = load_pockets()
 
 # Step 2: Define a custom dataset class
 class PocketsDataset(Dataset):
     def __init__(self, dataframe):
         self.dataframe = dataframe
-        self.features = dataframe.iloc[:, 4:].values  # Columns starting from Tooth 18 B
-        self.labels = dataframe['CHART TITLE'].values  # Assume CHART TITLE as labels for simplicity
+        # Convert features and labels to tensors once; each sample is then a view into them
+        self.features = torch.from_numpy(dataframe.iloc[:, 4:].to_numpy(dtype=np.float32))  # Columns starting from Tooth 18 B
+        self.labels = torch.from_numpy(dataframe['CHART TITLE'].to_numpy(dtype=np.float32))  # Assume CHART TITLE as labels for simplicity
 
     def __len__(self):
         return len(self.dataframe)
 
     def __getitem__(self, idx):
-        # Convert features and labels to tensors
-        x = torch.tensor(self.features[idx], dtype=torch.float32)
-        y = torch.tensor(self.labels[idx], dtype=torch.float32)  # Adjust dtype as necessary
-        return x, y
+        return self.features[idx], self.labels[idx]
 
 # Step 3: Create an instance of the dataset
 dataset = PocketsDataset(df)
@@ -3,75 +3,72 @@ import subprocess
 import numpy as np
 import pickle
 import re
+from data_loader import load_recessions
+from html_tables import write_html_table
 
-### --- Loading Excel files --- ###
-demographic_data = pd.read_excel('Data/DemographicData_snapshot.xlsx')
-pockets_data = pd.read_excel('Data/Pockets_snapshot.xlsx')
-missing_ss_data = pd.read_excel('Data/Missing_snapshot.xlsx')
-recessions_data = pd.read_excel('Data/Recessions_snapshot.xlsx')
+### --- Loading Excel file --- ###
+recessions_data = load_recessions()
 
 ### --- Define Columns and Patterns --- ###
 
 column_range = recessions_data.loc[:, 'Tooth 18 B':'Tooth 28 P'].columns # These are the columns we would like to check.
 pattern = re.compile(r'^\s*(\d{1,2})\s+(\d{1,2})\s+(\d{1,2})\s*$') # Standard format of most of the dataset: "x  y  z "
 recessions_data[column_range] = recessions_data[column_range].replace(r'^\s*$', np.nan, regex=True) # Standardize empty or whitespace-only values to NaN
+tooth_codes, tooth_values = pd.factorize(recessions_data[column_range].to_numpy().ravel()) # Tooth values as integer codes into tooth_values, -1 for NaN
+tooth_codes = pd.DataFrame(tooth_codes.reshape(-1, len(column_range)), index=recessions_data.index, columns=column_range)
+is_missing_tooth = tooth_codes < 0 # NaN tooth cells, shared by the checks below
+value_matches = pd.Series(tooth_values, dtype=object).astype(str).str.match(pattern).to_numpy(dtype=bool) # Pattern is matched once per distinct tooth value
+pattern_matches = pd.DataFrame(np.append(value_matches, False)[tooth_codes.to_numpy()], index=recessions_data.index, columns=column_range) # Per cell, NaN (code -1) never matches; the checks below look up their rows here
 
 ### --- Datatype 1: No Missing Data --- ###
 # Rows where all teeth data exists with no missing values 
 
-def row_matches_pattern(row):
-    # Function to check if all values in the row pattern above #
-    return all(pattern.match(str(row[col])) for col in column_range)
-no_missing_data = recessions_data[recessions_data.apply(row_matches_pattern, axis=1)]
+def rows_match_pattern(data):
+    # Function to check which rows have all values matching the pattern above #
+    return pattern_matches.loc[data.index].all(axis=1)
+no_missing_data = recessions_data[rows_match_pattern(recessions_data)]
 no_missing_ids = no_missing_data['ResearchID'].unique()
 recessions_data = recessions_data[~recessions_data['ResearchID'].isin(no_missing_ids)] 
 
 ### --- Datatype 2: Integer-Type Missing Data --- ###
 # Rows with some cells not matching the pattern
-def row_does_not_match_pattern(row):
-    for col in column_range:
-        cell_value = row[col]
-        if pd.isna(cell_value) or cell_value == "":
-            continue  # Empty cells are treated as matching
-        if not pattern.match(str(cell_value)):
-            return True
-    return False
-
-systematic_missing_data = recessions_data[recessions_data.apply(row_does_not_match_pattern, axis=1)]
+def rows_do_not_match_pattern(data):
+    is_empty = np.append(tooth_values == "", True)[tooth_codes.loc[data.index].to_numpy()]  # Empty cells (and NaN, code -1) are treated as matching
+    return (~is_empty & ~pattern_matches.loc[data.index]).any(axis=1)
+
+systematic_missing_data = recessions_data[rows_do_not_match_pattern(recessions_data)]
 systematic_missing_ids = systematic_missing_data['ResearchID'].unique()
 recessions_data = recessions_data[~recessions_data['ResearchID'].isin(systematic_missing_ids)]
 
 ### --- Datatype 3: Consistent Missing Data --- ###
 # ResearchIDs with consistent missing values across multiple visits
-def is_fully_consistent_missing_teeth(row):
-    research_id = row['ResearchID']
-    group = recessions_data[recessions_data['ResearchID'] == research_id]
-    if len(group) <= 1:
-        return False
-    for col in column_range:
-        if group[col].isna().all():
-            continue
-        elif not group[col].isna().all() and not group[col].notna().all():
-            return False
-    return True
-
-consistent_missing_data = recessions_data[recessions_data.apply(is_fully_consistent_missing_teeth, axis=1)]
+def inconsistent_missing_columns(data):
+    # Count the missing visits of each ResearchID and column, then compare them with its number of visits
+    is_missing = is_missing_tooth.loc[data.index].to_numpy()
+    group_codes, research_ids = pd.factorize(data['ResearchID'])
+    has_id = group_codes >= 0  # Rows without a ResearchID (code -1) belong to no patient and are never flagged
+    missing_counts = np.zeros((len(research_ids), is_missing.shape[1]), dtype=np.int64)
+    np.add.at(missing_counts, group_codes[has_id], is_missing[has_id])
+    visit_counts = np.bincount(group_codes[has_id], minlength=len(research_ids))
+    row_missing_counts = missing_counts[group_codes]
+    return has_id[:, None] & (row_missing_counts > 0) & (row_missing_counts < visit_counts[group_codes, None])
+
+def has_multiple_visits(data):
+    return data.groupby('ResearchID')['ResearchID'].transform('size') > 1
+
+def is_fully_consistent_missing_teeth(data):
+    return has_multiple_visits(data) & ~inconsistent_missing_columns(data).any(axis=1)
+
+consistent_missing_data = recessions_data[is_fully_consistent_missing_teeth(recessions_data)]
 consistent_missing_ids = consistent_missing_data['ResearchID'].unique()
 recessions_data = recessions_data[~recessions_data['ResearchID'].isin(consistent_missing_ids)]
 
 ### --- Datatype 4: Inconsistent Missing Data --- ###
 # ResearchIDs with inconsistent missing data across visits
-def is_inconsistent_missing_teeth(row):
-    research_id = row['ResearchID']
-    group = recessions_data[recessions_data['ResearchID'] == research_id]
-    if len(group) <= 1:
-        return False
-    for col in column_range:
-        if not group[col].isna().all() and not group[col].notna().all():
-            return True
-    return False
-
-inconsistent_missing_data = recessions_data[recessions_data.apply(is_inconsistent_missing_teeth, axis=1)]
+def is_inconsistent_missing_teeth(data):
+    return has_multiple_visits(data) & inconsistent_missing_columns(data).any(axis=1)
+
+inconsistent_missing_data = recessions_data[is_inconsistent_missing_teeth(recessions_data)]
 inconsistent_ids = inconsistent_missing_data['ResearchID'].unique()
 recessions_data = recessions_data[~recessions_data['ResearchID'].isin(inconsistent_ids)]
 
@@ -83,53 +80,57 @@ recessions_data = recessions_data[~recessions_data['ResearchID'].isin(single_obs
 # ### --- Datatype 6: Remaining Data --- ###
 remaining_data = recessions_data
 
+### --- All Datatypes --- ###
+# Each subset labelled with its datatype; the subsets share no patients, so they are summarized together
+typed_data = pd.concat([no_missing_data.assign(Data_Type="No Missing Data"),
+                        systematic_missing_data.assign(Data_Type="Systematic Missing Data"),
+                        consistent_missing_data.assign(Data_Type="Consistent Missing Data"),
+                        inconsistent_missing_data.assign(Data_Type="Inconsistent Missing Data"),
+                        single_observation_data.assign(Data_Type="Single Observation Data"),
+                        remaining_data.assign(Data_Type="Other (Remaining Data)")])
+
 ### --- HTML Report Generation --- ###
-def format_integer_missing_teeth_data(group, column_range):
-    group = group.sort_values(by='CHART DATE')
-    date_missing_teeth = {}
-    date_missing_integer_values = {}
-    
-    for _, row in group.iterrows():
-        chart_date = row['CHART DATE']
-        if chart_date not in date_missing_teeth:
-            date_missing_teeth[chart_date] = []
-            date_missing_integer_values[chart_date] = []
-        
-        for col in column_range:
-            cell_value = row[col]
-            if pd.isna(cell_value):
-                date_missing_teeth[chart_date].append(col)
-            elif not pattern.match(str(cell_value)):
-                date_missing_integer_values[chart_date].append(col)
-    
-    formatted_lines = []
-    for date in date_missing_teeth.keys():
-        missing_teeth_str = f"{date} - Missing: ({', '.join(date_missing_teeth[date])})" if date_missing_teeth[date] else ""
-        missing_integer_values_str = f" ---> Missing Integer Values: ({', '.join(date_missing_integer_values[date])})<br>" if date_missing_integer_values[date] else ""
-        combined_str = "<br>".join(filter(None, [missing_teeth_str, missing_integer_values_str]))
-        formatted_lines.append(combined_str)
-    
-    return "<br>".join(formatted_lines)
-
-def create_summary_df(data, column_range):
-    summary_data = []
-    for research_id, group in data.groupby('ResearchID'):
-        missing_data_summary = format_integer_missing_teeth_data(group, column_range)
-        summary_data.append({'ResearchID': research_id, 'Reported Issues': missing_data_summary})
-    return pd.DataFrame(summary_data)
-
-# Generating summaries for each datatype
-no_missing_data_summary = create_summary_df(no_missing_data, column_range)
-consistent_missing_teeth_summary = create_summary_df(consistent_missing_data, column_range)
-single_observation_summary = create_summary_df(single_observation_data, column_range)
-systematic_missing_summary = create_summary_df(systematic_missing_data, column_range)
-inconsistent_missing_summary = create_summary_df(inconsistent_missing_data, column_range)
-remaining_summary = create_summary_df(remaining_data, column_range)
-
-# HTML Report Writing with Custom Style
-html_file_path = "Data Reports HTML/recessions_snapshots.html"
-with open(html_file_path, "w") as file:
-    file.write("""
+def format_integer_missing_teeth_data(data, column_range):
+    data = data.sort_values(by=['ResearchID', 'CHART DATE'], kind='stable')
+
+    is_missing = is_missing_tooth.loc[data.index].to_numpy()
+    is_incomplete = ~is_missing & ~pattern_matches.loc[data.index].to_numpy()
+
+    # One entry per ResearchID and date, numbered in date order
+    entry_keys = data.groupby(['ResearchID', 'CHART DATE'], sort=False, dropna=False).ngroup().to_numpy()
+    entries = data[['ResearchID', 'CHART DATE']].iloc[np.unique(entry_keys, return_index=True)[1]].reset_index(drop=True)
+
+    def join_teeth(mask):
+        rows, cols = np.nonzero(mask)
+        teeth = pd.Series(column_range[cols], index=entry_keys[rows], dtype=object)
+        return teeth.groupby(level=0).agg(', '.join).reindex(entries.index)
+
+    missing_teeth_str = (entries['CHART DATE'].map(str) + " - Missing: (" + join_teeth(is_missing) + ")").fillna("")
+    missing_integer_values_str = (" ---> Missing Integer Values: (" + join_teeth(is_incomplete) + ")<br>").fillna("")
+    separator = np.where((missing_teeth_str != "") & (missing_integer_values_str != ""), "<br>", "")
+    formatted_lines = missing_teeth_str + separator + missing_integer_values_str
+
+    return formatted_lines.groupby(entries['ResearchID']).agg("<br>".join)
+
+def create_summary_dfs(data, column_range):
+    summary = format_integer_missing_teeth_data(data, column_range).reset_index(name='Reported Issues')
+    data_types = summary['ResearchID'].map(data.groupby('ResearchID')['Data_Type'].first())
+    return {data_type: group.reset_index(drop=True) for data_type, group in summary.groupby(data_types)}
+
+# Generating summaries for all datatypes in one pass; datatypes without any patients get an empty table without columns
+summary_dfs = create_summary_dfs(typed_data, column_range)
+no_missing_data_summary = summary_dfs.get("No Missing Data", pd.DataFrame())
+consistent_missing_teeth_summary = summary_dfs.get("Consistent Missing Data", pd.DataFrame())
+single_observation_summary = summary_dfs.get("Single Observation Data", pd.DataFrame())
+systematic_missing_summary = summary_dfs.get("Systematic Missing Data", pd.DataFrame())
+inconsistent_missing_summary = summary_dfs.get("Inconsistent Missing Data", pd.DataFrame())
+remaining_summary = summary_dfs.get("Other (Remaining Data)", pd.DataFrame())
+
+# The labelled subsets, renumbered as one DataFrame
+pickle_df = typed_data.reset_index(drop=True)
+
+# Page header and styles of the HTML report
+html_header = """
     <html>
     <head>
         <title>Recessions Data Summary</title>
@@ -154,50 +155,39 @@ with open(html_file_path, "w") as file:
         </style>
     </head>
     <body>
-    """)
-
-    sections = [
-        ("Datatype 1: No Missing Data", "These patients have complete records with no missing data across all teeth.", no_missing_data_summary),
-        ("Datatype 2: Consistent Missing Teeth Data", "Patients with consistent missing data across multiple visits for specific teeth.", consistent_missing_teeth_summary),
-        ("Datatype 3: Single Observation ResearchIDs", "Patients who only have one visit on record, limiting insights on data consistency.", single_observation_summary),
-        ("Datatype 4: Integer-Type Missing Data", "These records contain systematic errors where integer values are missing or improperly formatted.", systematic_missing_summary),
-        ("Datatype 5: Inconsistent Missing Data", "Records with inconsistent missing data patterns across visits.", inconsistent_missing_summary),
-        ("Datatype 6: Other Data (Remaining)", "Records requiring further investigation due to unique data patterns.", remaining_summary)
-    ]
-
-    file.write("<h1>Teeth Recessions Data Summary</h1>")
-
-    for title, description, summary_df in sections:
-        file.write(f"<div class='container'><h2>{title}</h2><p>{description}</p>")
-        file.write(summary_df.to_html(index=False, escape=False))
-        file.write("</div><br>")
-
-    file.write("</body></html>")
-
-# Open the HTML file in Safari
-try:
-    subprocess.run(["open", "-a", "Safari", html_file_path])
-    print(f"HTML file created and opened in Safari: {html_file_path}")
-except Exception as e:
-    print(f"Could not open Safari. Error: {e}")
-
-# Add a Data_Type column to each subset
-no_missing_data["Data_Type"] = "No Missing Data"
-systematic_missing_data["Data_Type"] = "Systematic Missing Data"
-consistent_missing_data["Data_Type"] = "Consistent Missing Data"
-inconsistent_missing_data["Data_Type"] = "Inconsistent Missing Data"
-single_observation_data["Data_Type"] = "Single Observation Data"
-remaining_data["Data_Type"] = "Other (Remaining Data)"
-
-# Concatenate all subsets into one DataFrame
-pickle_df = pd.concat([no_missing_data, 
-                       systematic_missing_data, 
-                       consistent_missing_data, 
-                       inconsistent_missing_data, 
-                       single_observation_data, 
-                       remaining_data], 
-                      ignore_index=True)
-
-# Save the concatenated DataFrame as a pickle file
-with open("Data_PKL/recessions_snapshots.pkl", "wb") as f:
-    pickle.dump(pickle_df, f)
\ No newline at end of file
+    """
+
+if __name__ == "__main__":
+    # HTML Report Writing with Custom Style
+    html_file_path = "Data Reports HTML/recessions_snapshots.html"
+    with open(html_file_path, "w", buffering=1 << 20) as file:
+        file.write(html_header)
+
+        sections = [
+            ("Datatype 1: No Missing Data", "These patients have complete records with no missing data across all teeth.", no_missing_data_summary),
+            ("Datatype 2: Consistent Missing Teeth Data", "Patients with consistent missing data across multiple visits for specific teeth.", consistent_missing_teeth_summary),
+            ("Datatype 3: Single Observation ResearchIDs", "Patients who only have one visit on record, limiting insights on data consistency.", single_observation_summary),
+            ("Datatype 4: Integer-Type Missing Data", "These records contain systematic errors where integer values are missing or improperly formatted.", systematic_missing_summary),
+            ("Datatype 5: Inconsistent Missing Data", "Records with inconsistent missing data patterns across visits.", inconsistent_missing_summary),
+            ("Datatype 6: Other Data (Remaining)", "Records requiring further investigation due to unique data patterns.", remaining_summary)
+        ]
+
+        file.write("<h1>Teeth Recessions Data Summary</h1>")
+
+        for title, description, summary_df in sections:
+            file.write(f"<div class='container'><h2>{title}</h2><p>{description}</p>")
+            write_html_table(file, summary_df)
+            file.write("</div><br>")
+
+        file.write("</body></html>")
+
+    # Open the HTML file in Safari
+    try:
+        subprocess.run(["open", "-a", "Safari", html_file_path])
+        print(f"HTML file created and opened in Safari: {html_file_path}")
+    except Exception as e:
+        print(f"Could not open Safari. Error: {e}")
+
+    # Save the concatenated DataFrame as a pickle file
+    with open("Data_PKL/recessions_snapshots.pkl", "wb") as f:
+        pickle.dump(pickle_df, f)